@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da leitura do CSV da ANP: leitura padrão vs. leitura com esquema explícito.
+
+Gera um CSV grande replicando as linhas de data/ultimas-4-semanas-glp.csv e mede
+load_data() + clean_data() em cada modo.
+
+Uso:
+    python benchmarks/bench_csv_ingest.py --copies 100 --repeat 3
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data_processor import GLPDatabaseProcessor, PYARROW_AVAILABLE
+
+SOURCE_CSV = project_root / "data" / "ultimas-4-semanas-glp.csv"
+
+
+def build_large_csv(target: Path, copies: int) -> int:
+    """Escreve em target o cabeçalho original e as linhas de dados repetidas `copies` vezes."""
+    lines = SOURCE_CSV.read_bytes().splitlines(keepends=True)
+    header, rows = lines[0], b"".join(lines[1:])
+    with open(target, "wb") as f:
+        f.write(header)
+        for _ in range(copies):
+            f.write(rows)
+    return (len(lines) - 1) * copies
+
+
+def time_ingest(csv_path: Path, repeat: int, **kwargs) -> float:
+    """Melhor tempo (s) de load_data() + clean_data() em `repeat` execuções."""
+    best = float("inf")
+    for _ in range(repeat):
+        processor = GLPDatabaseProcessor(str(csv_path), **kwargs)
+        start = time.perf_counter()
+        processor.load_data()
+        processor.clean_data()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=100, help="Vezes que o CSV de exemplo é replicado")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por modo (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "glp-grande.csv"
+        total_rows = build_large_csv(csv_path, args.copies)
+        size_mb = csv_path.stat().st_size / 1024 / 1024
+        print(f"CSV sintético: {total_rows} linhas, {size_mb:.1f} MB")
+
+        modes = [
+            ("padrão (inferência)", {"fast_ingest": False}),
+            ("esquema explícito, engine c", {"engine": "c"}),
+        ]
+        if PYARROW_AVAILABLE:
+            modes.append(("esquema explícito, engine pyarrow", {"engine": "pyarrow"}))
+        else:
+            print("pyarrow não instalado: modo pyarrow ignorado")
+
+        baseline = None
+        for label, kwargs in modes:
+            elapsed = time_ingest(csv_path, args.repeat, **kwargs)
+            baseline = baseline or elapsed
+            print(f"{label:<36} {elapsed:8.3f} s   {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
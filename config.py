@@ -22,6 +22,18 @@ class Config:
     # Configurações de processamento
     DEFAULT_DAYS_BACK = 30
     MAX_RESULTS_LIMIT = 1000
+    # Carregar o CSV em segundo plano; rotas de dados respondem 503 até ficarem prontas
+    DATA_LOAD_IN_BACKGROUND = os.environ.get('DATA_LOAD_IN_BACKGROUND', '1').lower() not in ('0', 'false', 'nao')
+    # Engine do read_csv: 'c' (padrão) ou 'pyarrow' (requer o pacote pyarrow)
+    CSV_ENGINE = os.environ.get('CSV_ENGINE', 'c')
+    
+    # Limite de taxa por cliente nas rotas /api/ (token bucket), desligado por padrão
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '0').lower() in ('1', 'true', 'sim')
+    # Cabeçalho com o IP do cliente definido pelo proxy confiável (ex.: 'X-Forwarded-For' no Render);
+    # vazio usa o endereço da conexão, que atrás de um proxy é o mesmo para todos os usuários
+    RATE_LIMIT_CLIENT_HEADER = os.environ.get('RATE_LIMIT_CLIENT_HEADER', '')
+    RATE_LIMIT_PER_SECOND = float(os.environ.get('RATE_LIMIT_PER_SECOND', 10))
+    RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', 40))
     
     # Configurações da aplicação
     APP_NAME = "Gas Mais Barato"
@@ -45,6 +57,8 @@ class TestingConfig(Config):
     """Configuração para testes."""
     TESTING = True
     SECRET_KEY = 'test-secret-key'
+    DATA_LOAD_IN_BACKGROUND = False
+    RATE_LIMIT_ENABLED = False
 
 
 # Dicionário de configurações
@@ -52,5 +66,6 @@ config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
-    'default': DevelopmentConfig
+    # Sem FLASK_CONFIG (ex.: deploy no Render) a aplicação não roda em modo debug
+    'default': ProductionConfig
 } 
\ No newline at end of file
@@ -2,13 +2,23 @@
 Aplicação Flask principal para o dashboard de preços de GLP.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, current_app, make_response
+from functools import wraps
+import gzip
+import hashlib
 import os
+import time
 import logging
+import threading
 from pathlib import Path
-import unidecode
 
-from .data_processor import process_glp_data, GLPDatabaseProcessor
+from config import config
+from .data_processor import process_glp_data
+from .throttling import SingleFlight, TokenBucketLimiter
+from .columnar import (
+    JSON_MIMETYPE, ARROW_MIMETYPE, MSGPACK_MIMETYPE, FORMAT_MIMETYPES,
+    available_mimetypes, search_columns, to_json_rows, to_arrow_ipc, to_msgpack
+)
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -18,8 +28,26 @@ logger = logging.getLogger(__name__)
 DATA_PROCESSOR = None
 CSV_FILE_PATH = None
 
+# Estado do carregamento dos dados (exposto em /readyz)
+DATA_READY = threading.Event()
+DATA_STATUS = {
+    'status': 'starting',
+    'version': None,
+    'rows': None,
+    'load_duration_ms': None,
+    'loaded_at': None,
+    'error': None,
+}
+_DATA_STATUS_LOCK = threading.Lock()
 
-def create_app():
+# Cache de páginas renderizadas: (template, versão do dataset, mtime dos templates) -> HTML
+PAGE_CACHE = {}
+_PAGE_CACHE_LOCK = threading.Lock()
+# Numa falta de cache, só uma requisição por chave monta a página; as demais aguardam
+_PAGE_RENDER_FLIGHT = SingleFlight()
+
+
+def create_app(config_name=None):
     """Factory function para criar a aplicação Flask."""
     # Configurar caminhos
     project_root = Path(__file__).parent.parent
@@ -31,10 +59,17 @@ def create_app():
                 template_folder=str(template_dir),
                 static_folder=str(static_dir))
     
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
+    config_name = config_name or os.environ.get('FLASK_CONFIG', 'default')
+    app.config.from_object(config[config_name])
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', app.config.get('SECRET_KEY') or 'dev-secret-key')
     
-    # Inicializar processador de dados
-    initialize_data_processor(project_root)
+    # Inicializar processador de dados (em segundo plano, para não atrasar o bind da porta)
+    initialize_data_processor(
+        app.config['CSV_FILE_PATH'],
+        days_back=app.config['DEFAULT_DAYS_BACK'],
+        engine=app.config['CSV_ENGINE'],
+        background=app.config['DATA_LOAD_IN_BACKGROUND']
+    )
     
     # Registrar rotas
     register_routes(app)
@@ -42,97 +77,320 @@ def create_app():
     return app
 
 
-def initialize_data_processor(project_root):
-    """Inicializa o processador de dados."""
-    global DATA_PROCESSOR, CSV_FILE_PATH
+def initialize_data_processor(csv_file_path, days_back=30, engine='c', background=False):
+    """
+    Inicializa o processador de dados.
+    
+    Args:
+        csv_file_path (Path): Caminho para o arquivo CSV da ANP
+        days_back (int): Número de dias para trás
+        engine (str): Engine do read_csv ('c' ou 'pyarrow')
+        background (bool): Se True, carrega os dados em uma thread e retorna imediatamente
+        
+    Returns:
+        threading.Thread | None: Thread de carregamento, quando em segundo plano
+    """
+    global CSV_FILE_PATH
     
-    # Caminho para o arquivo CSV
-    CSV_FILE_PATH = project_root / "data" / "ultimas-4-semanas-glp.csv"
+    CSV_FILE_PATH = Path(csv_file_path)
     
     if not CSV_FILE_PATH.exists():
         logger.error(f"Arquivo CSV não encontrado: {CSV_FILE_PATH}")
         raise FileNotFoundError(f"Arquivo CSV não encontrado: {CSV_FILE_PATH}")
     
+    DATA_READY.clear()
+    _update_data_status(status='loading', error=None)
+    
+    if not background:
+        _load_data_processor(CSV_FILE_PATH, days_back, engine)
+        return None
+    
+    thread = threading.Thread(
+        target=_load_data_processor_safely,
+        args=(CSV_FILE_PATH, days_back, engine),
+        name='glp-data-loader',
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _load_data_processor(csv_file_path, days_back, engine='c'):
+    """Carrega o CSV, processa os dados e publica o processador pronto."""
+    global DATA_PROCESSOR
+    
+    start = time.perf_counter()
     try:
         logger.info("Inicializando processador de dados...")
-        DATA_PROCESSOR = process_glp_data(str(CSV_FILE_PATH), days_back=30)
-        logger.info("Processador de dados inicializado com sucesso!")
+        processor = process_glp_data(str(csv_file_path), days_back=days_back, engine=engine)
     except Exception as e:
         logger.error(f"Erro ao inicializar processador de dados: {e}")
+        _update_data_status(status='error', error=str(e))
         raise
+    
+    DATA_PROCESSOR = processor
+    _update_data_status(
+        status='ready',
+        version=get_dataset_version(csv_file_path),
+        rows=len(processor.processed_df),
+        load_duration_ms=round((time.perf_counter() - start) * 1000, 1),
+        loaded_at=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    )
+    DATA_READY.set()
+    logger.info(f"Processador de dados inicializado com sucesso em {DATA_STATUS['load_duration_ms']} ms!")
+
+
+def _load_data_processor_safely(csv_file_path, days_back, engine='c'):
+    """Alvo da thread de carregamento: o erro já fica registrado em DATA_STATUS."""
+    try:
+        _load_data_processor(csv_file_path, days_back, engine)
+    except Exception:
+        pass
+
+
+def _update_data_status(**fields):
+    """Atualiza o estado do carregamento de forma thread-safe."""
+    with _DATA_STATUS_LOCK:
+        DATA_STATUS.update(fields)
+
+
+def get_dataset_version(csv_file_path):
+    """
+    Identificador da versão do dataset, derivado do mtime e do tamanho do CSV.
+    
+    Returns:
+        str: Versão no formato '<mtime_ns hex>-<tamanho hex>'
+    """
+    stat = Path(csv_file_path).stat()
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def requires_data(view):
+    """Decorator que responde 503 rapidamente enquanto os dados não estão prontos."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if DATA_READY.is_set():
+            return view(*args, **kwargs)
+        message = 'Dados ainda estão sendo carregados. Tente novamente em instantes.'
+        if DATA_STATUS['status'] == 'error':
+            message = f"Falha ao carregar os dados: {DATA_STATUS['error']}"
+        if request.path.startswith('/api/'):
+            response = jsonify({'success': False, 'error': message})
+        else:
+            response = render_template('error.html', error=message)
+        return response, 503, {'Retry-After': '5'}
+    return wrapper
+
+
+def reseller_to_dict(reseller, price, collected_at):
+    """Converte os atributos de uma revenda e uma coleta para o formato da API."""
+    return {
+        'municipio': reseller['Municipio'],
+        'estado': reseller['Estado - Sigla'],
+        'revenda': reseller['Revenda'],
+        'cnpj': reseller['CNPJ da Revenda'],
+        'endereco': f"{reseller['Nome da Rua']}, {reseller['Numero Rua']} - {reseller['Bairro']}",
+        'cep': reseller['Cep'],
+        'preco': float(price),
+        'data_coleta': collected_at.strftime('%d/%m/%Y'),
+        'bandeira': reseller['Bandeira']
+    }
+
+
+def _template_mtime(template_name):
+    """Maior mtime entre o template e o base.html que ele estende."""
+    template_dir = Path(current_app.template_folder)
+    return max(
+        (template_dir / name).stat().st_mtime_ns
+        for name in (template_name, 'base.html')
+    )
+
+
+def render_cached_page(template_name, context_factory=None):
+    """
+    Renderiza um template usando o cache de páginas.
+    
+    O HTML (e sua versão gzip) fica em cache enquanto a versão do dataset e o
+    mtime dos templates não mudarem; num acerto, nem o contexto (pandas) nem o
+    Jinja são executados. Numa falta, requisições simultâneas para a mesma
+    chave são coalescidas e a página é montada uma única vez.
+    
+    Args:
+        template_name (str): Nome do template
+        context_factory (callable): Função que retorna o contexto do template
+        
+    Returns:
+        flask.Response: Resposta com ETag, comprimida quando o cliente aceita gzip
+    """
+    key = (template_name, DATA_STATUS['version'], _template_mtime(template_name))
+    
+    def build_page():
+        # Outra requisição pode ter montado a página entre a falta e a entrada no single-flight
+        cached = PAGE_CACHE.get(key)
+        if cached is not None:
+            return cached
+        context = context_factory() if context_factory else {}
+        html = render_template(template_name, **context).encode('utf-8')
+        etag = hashlib.sha1(html).hexdigest()
+        built = {
+            'html': html,
+            'gzip': gzip.compress(html, compresslevel=6),
+            # Bytes diferentes por codificação: cada uma tem sua própria ETag forte
+            'etag': etag,
+            'gzip_etag': f'{etag}-gz',
+        }
+        with _PAGE_CACHE_LOCK:
+            # Descartar versões antigas da mesma página
+            for stale_key in [k for k in PAGE_CACHE if k[0] == template_name]:
+                del PAGE_CACHE[stale_key]
+            PAGE_CACHE[key] = built
+        return built
+    
+    entry = PAGE_CACHE.get(key)
+    if entry is None:
+        entry = _PAGE_RENDER_FLIGHT.do(key, build_page)
+    
+    # Qualidade 0 (ex.: "gzip;q=0") significa que o cliente recusa gzip
+    if request.accept_encodings['gzip'] > 0:
+        response = make_response(entry['gzip'])
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(entry['gzip_etag'])
+    else:
+        response = make_response(entry['html'])
+        response.set_etag(entry['etag'])
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+
+def negotiate_mimetype():
+    """
+    Escolhe o formato da resposta pelo parâmetro ?format= ou pelo cabeçalho Accept.
+    
+    Returns:
+        str | None: Mimetype escolhido, ou None se o formato pedido não está disponível
+    """
+    available = available_mimetypes()
+    requested = request.args.get('format', '').strip().lower()
+    if requested:
+        mimetype = FORMAT_MIMETYPES.get(requested)
+        return mimetype if mimetype in available else None
+    return request.accept_mimetypes.best_match(available, default=JSON_MIMETYPE)
 
 
 def register_routes(app):
     """Registra as rotas da aplicação."""
     
+    # Consultas idênticas simultâneas (/api/search, /api/stats) são calculadas uma única vez
+    single_flight = SingleFlight()
+    
+    if app.config['RATE_LIMIT_ENABLED']:
+        rate_limiter = TokenBucketLimiter(
+            rate=app.config['RATE_LIMIT_PER_SECOND'],
+            burst=app.config['RATE_LIMIT_BURST']
+        )
+        
+        client_header = app.config['RATE_LIMIT_CLIENT_HEADER']
+        
+        def client_id():
+            """IP do cliente: do cabeçalho do proxy confiável, se configurado, ou da conexão."""
+            if client_header:
+                value = request.headers.get(client_header, '')
+                # Em listas (X-Forwarded-For) o último endereço é o acrescentado pelo proxy confiável
+                forwarded = value.split(',')[-1].strip()
+                if forwarded:
+                    return forwarded
+            return request.remote_addr
+        
+        @app.before_request
+        def limit_api_rate():
+            """Limita a taxa de requisições à API por cliente (token bucket)."""
+            if not request.path.startswith('/api/'):
+                return None
+            allowed, retry_after = rate_limiter.allow(client_id())
+            if allowed:
+                return None
+            return jsonify({
+                'success': False,
+                'error': 'Muitas requisições. Tente novamente em instantes.'
+            }), 429, {'Retry-After': str(max(1, int(retry_after + 0.999)))}
+    
     @app.route('/')
+    @requires_data
     def index():
         """Página principal do dashboard."""
+        def index_context():
+            return {
+                # Obter estatísticas gerais
+                'stats': DATA_PROCESSOR.get_summary_stats(),
+                # Obter listas para filtros
+                'cities': DATA_PROCESSOR.get_cities_list(),
+                'states': DATA_PROCESSOR.get_states_list(),
+            }
+        
         try:
-            # Obter estatísticas gerais
-            stats = DATA_PROCESSOR.get_summary_stats()
-            
-            # Obter listas para filtros
-            cities = DATA_PROCESSOR.get_cities_list()
-            states = DATA_PROCESSOR.get_states_list()
-            
-            return render_template('index.html', 
-                                 stats=stats, 
-                                 cities=cities, 
-                                 states=states)
+            return render_cached_page('index.html', index_context)
         except Exception as e:
             logger.error(f"Erro na página principal: {e}")
             return render_template('error.html', error=str(e))
 
     @app.route('/api/search')
+    @requires_data
     def search_prices():
-        """API para busca de preços com filtros."""
+        """
+        API para busca de preços com filtros.
+        
+        Responde em JSON por padrão; clientes podem pedir um formato colunar
+        via Accept (application/vnd.apache.arrow.stream, application/msgpack)
+        ou ?format=arrow|msgpack.
+        """
         try:
             city = request.args.get('city', '').strip()
             state = request.args.get('state', '').strip()
             limit = int(request.args.get('limit', 50))
 
-            filtered_df = DATA_PROCESSOR.processed_df.copy()
-            if state:
-                filtered_df = filtered_df[filtered_df['Estado - Sigla'] == state.upper()]
-            if city:
-                city_norm = unidecode.unidecode(city).strip().lower()
-                filtered_df = filtered_df[
-                    filtered_df['Municipio'].apply(lambda x: unidecode.unidecode(str(x)).strip().lower() == city_norm)
-                ]
-
-            # Ordenar por data de coleta (mais recente primeiro)
-            if 'Data da Coleta' in filtered_df.columns:
-                filtered_df = filtered_df.sort_values('Data da Coleta', ascending=False)
-
-            # Limitar resultados
-            if len(filtered_df) > limit:
-                filtered_df = filtered_df.head(limit)
-
-            # Converter para formato JSON
-            results = []
-            for _, row in filtered_df.iterrows():
-                results.append({
-                    'municipio': row['Municipio'],
-                    'estado': row['Estado - Sigla'],
-                    'revenda': row['Revenda'],
-                    'cnpj': row['CNPJ da Revenda'],
-                    'endereco': f"{row['Nome da Rua']}, {row['Numero Rua']} - {row['Bairro']}",
-                    'cep': row['Cep'],
-                    'preco': float(row['Valor de Venda']),
-                    'data_coleta': row['Data da Coleta'].strftime('%d/%m/%Y'),
-                    'bandeira': row['Bandeira']
-                })
+            mimetype = negotiate_mimetype()
+            if mimetype is None:
+                return jsonify({
+                    'success': False,
+                    'error': f"Formato não suportado. Disponíveis: {', '.join(available_mimetypes())}"
+                }), 406
 
-            return jsonify({
-                'success': True,
-                'data': results,
-                'total_results': len(results),
-                'filters_applied': {
-                    'city': city,
-                    'state': state
+            def search():
+                # Filtra pela dimensão de revendas, ordena (mais recente primeiro) e limita
+                filtered_df = DATA_PROCESSOR.search_prices(city=city, state=state, limit=limit)
+                columns = search_columns(filtered_df)
+                matched_cities = DATA_PROCESSOR.match_cities(city, state) if city else []
+
+                # Formatos colunares: gerados direto dos arrays, sem um dict por linha
+                if mimetype == ARROW_MIMETYPE:
+                    return to_arrow_ipc(columns, city=city, state=state, matched_cities='|'.join(matched_cities))
+                if mimetype == MSGPACK_MIMETYPE:
+                    return to_msgpack(columns, filters_applied={'city': city, 'state': state},
+                                      matched_cities=matched_cities)
+
+                # Converter para formato JSON
+                results = to_json_rows(columns)
+
+                return {
+                    'success': True,
+                    'data': results,
+                    'total_results': len(results),
+                    'filters_applied': {
+                        'city': city,
+                        'state': state
+                    },
+                    'matched_cities': matched_cities
                 }
-            })
+
+            key = ('search', DATA_STATUS['version'], city, state, limit, mimetype)
+            payload = single_flight.do(key, search)
+            if mimetype == JSON_MIMETYPE:
+                response = jsonify(payload)
+            else:
+                response = app.response_class(payload, mimetype=mimetype)
+            response.vary.add('Accept')
+            return response
 
         except Exception as e:
             logger.error(f"Erro na busca: {e}")
@@ -142,6 +400,7 @@ def register_routes(app):
             }), 500
 
     @app.route('/api/cities')
+    @requires_data
     def get_cities():
         """API para obter lista de cidades."""
         try:
@@ -157,7 +416,26 @@ def register_routes(app):
                 'error': str(e)
             }), 500
 
+    @app.route('/api/cities/suggest')
+    @requires_data
+    def suggest_cities():
+        """API de sugestões de cidades, tolerante a acentos e erros de digitação."""
+        try:
+            query = request.args.get('q', '').strip()
+            limit = max(1, min(int(request.args.get('limit', 10)), 50))
+            return jsonify({
+                'success': True,
+                'data': DATA_PROCESSOR.suggest_cities(query, limit=limit) if query else []
+            })
+        except Exception as e:
+            logger.error(f"Erro ao sugerir cidades: {e}")
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
+
     @app.route('/api/states')
+    @requires_data
     def get_states():
         """API para obter lista de estados."""
         try:
@@ -174,65 +452,130 @@ def register_routes(app):
             }), 500
 
     @app.route('/api/stats')
+    @requires_data
     def get_stats():
         """API para obter estatísticas dos dados, com suporte a filtros contextuais."""
         try:
             city = request.args.get('city', '').strip()
             state = request.args.get('state', '').strip()
-            df = DATA_PROCESSOR.processed_df.copy()
-            if city:
-                df = df[df['Municipio'].str.contains(city, case=False, na=False)]
-            if state:
-                df = df[df['Estado - Sigla'] == state.upper()]
-            temp_processor = GLPDatabaseProcessor(DATA_PROCESSOR.csv_file_path)
-            temp_processor.df = df.copy()
-            temp_processor.processed_df = df.copy()
-            stats = temp_processor.get_summary_stats()
-            # KPIs contextuais
-            if city:
-                # KPIs para cidade
-                kpis = {
-                    'kpi_type': 'city',
-                    'avg_price': stats['kpis']['avg_price'],
-                    'variation': stats['kpis']['avg_price']['variation'],
-                    'total_companies': stats['kpis']['total_companies'],
-                    'min_price': df['Valor de Venda'].min() if not df.empty else None,
-                    'max_price': df['Valor de Venda'].max() if not df.empty else None,
-                }
-            elif state:
-                # KPIs para estado
-                kpis = {
-                    'kpi_type': 'state',
-                    'avg_price': stats['kpis']['avg_price'],
-                    'variation': stats['kpis']['avg_price']['variation'],
-                    'total_cities': stats['kpis']['total_cities'],
-                    'total_companies': stats['kpis']['total_companies'],
+            trimmed = request.args.get('trimmed', '').strip().lower() in ('1', 'true', 'sim')
+
+            def compute_stats():
+                stats = DATA_PROCESSOR.subset(city=city, state=state, trimmed=trimmed).get_summary_stats()
+                # KPIs contextuais
+                if city:
+                    # KPIs para cidade
+                    kpis = {
+                        'kpi_type': 'city',
+                        'avg_price': stats['kpis']['avg_price'],
+                        'variation': stats['kpis']['avg_price']['variation'],
+                        'total_companies': stats['kpis']['total_companies'],
+                        'min_price': stats['min_price'],
+                        'max_price': stats['max_price'],
+                    }
+                elif state:
+                    # KPIs para estado
+                    kpis = {
+                        'kpi_type': 'state',
+                        'avg_price': stats['kpis']['avg_price'],
+                        'variation': stats['kpis']['avg_price']['variation'],
+                        'total_cities': stats['kpis']['total_cities'],
+                        'total_companies': stats['kpis']['total_companies'],
+                    }
+                else:
+                    # KPIs globais
+                    kpis = {
+                        'kpi_type': 'global',
+                        'avg_price': stats['kpis']['avg_price'],
+                        'variation': stats['kpis']['avg_price']['variation'],
+                        'total_cities': stats['kpis']['total_cities'],
+                        'total_companies': stats['kpis']['total_companies'],
+                    }
+                kpis['dates'] = stats['kpis']['dates']
+                kpis['trimmed'] = trimmed
+                kpis['outlier_records'] = stats['outlier_records']
+                if city:
+                    kpis['matched_cities'] = DATA_PROCESSOR.match_cities(city, state)
+                return {
+                    'success': True,
+                    'data': kpis
                 }
-            else:
-                # KPIs globais
-                kpis = {
-                    'kpi_type': 'global',
-                    'avg_price': stats['kpis']['avg_price'],
-                    'variation': stats['kpis']['avg_price']['variation'],
-                    'total_cities': stats['kpis']['total_cities'],
-                    'total_companies': stats['kpis']['total_companies'],
+
+            key = ('stats', DATA_STATUS['version'], city, state, trimmed)
+            return jsonify(single_flight.do(key, compute_stats))
+        except Exception as e:
+            logger.error(f"Erro ao obter estatísticas: {e}")
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
+
+    @app.route('/api/brands')
+    @requires_data
+    def get_brands():
+        """API para comparar bandeiras (preço médio, mínimo e coletas por semana)."""
+        try:
+            city = request.args.get('city', '').strip()
+            state = request.args.get('state', '').strip()
+            brands = [brand for brand in request.args.get('brands', '').split(',') if brand.strip()]
+            weeks = max(1, int(request.args.get('weeks', 4)))
+            comparison = DATA_PROCESSOR.get_brand_comparison(state=state, city=city, brands=brands, weeks=weeks)
+            return jsonify({
+                'success': True,
+                'data': comparison,
+                'filters_applied': {
+                    'city': city,
+                    'state': state,
+                    'brands': brands,
+                    'weeks': weeks
                 }
-            kpis['dates'] = stats['kpis']['dates']
+            })
+        except Exception as e:
+            logger.error(f"Erro ao comparar bandeiras: {e}")
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
+
+    @app.route('/api/reseller/<path:cnpj>')
+    @requires_data
+    def get_reseller(cnpj):
+        """API para obter uma revenda pelo CNPJ (com ou sem pontuação)."""
+        try:
+            reseller = DATA_PROCESSOR.get_reseller(cnpj)
+            if reseller is None:
+                return jsonify({
+                    'success': False,
+                    'error': f"Revenda não encontrada: {cnpj}"
+                }), 404
             return jsonify({
                 'success': True,
-                'data': kpis
+                'data': reseller_to_dict(reseller, reseller['Valor de Venda'], reseller['Data da Coleta'])
             })
         except Exception as e:
-            logger.error(f"Erro ao obter estatísticas: {e}")
+            logger.error(f"Erro ao obter revenda: {e}")
             return jsonify({
                 'success': False,
                 'error': str(e)
             }), 500
 
+    @app.route('/healthz')
+    def healthz():
+        """Liveness: o processo está de pé e respondendo."""
+        return jsonify({'status': 'ok'})
+
+    @app.route('/readyz')
+    def readyz():
+        """Readiness: dados carregados, versão, total de registros e tempo de carga."""
+        with _DATA_STATUS_LOCK:
+            payload = dict(DATA_STATUS)
+        payload['ready'] = DATA_READY.is_set()
+        return jsonify(payload), 200 if payload['ready'] else 503
+
     @app.route('/about')
     def about():
         """Página sobre o projeto."""
-        return render_template('about.html')
+        return render_cached_page('about.html')
 
     @app.errorhandler(404)
     def not_found(error):
@@ -0,0 +1,135 @@
+"""
+Busca tolerante a acentos e erros de digitação para nomes de municípios.
+"""
+
+import re
+from collections import Counter
+
+import unidecode
+
+# Similaridade mínima (Jaccard de trigramas) para aceitar um candidato aproximado
+MIN_SIMILARITY = 0.3
+# Pontuação dos nomes que começam com a consulta (abaixo só do nome exato)
+PREFIX_SCORE = 0.9
+
+
+def normalize_city(name: str) -> str:
+    """
+    Normaliza um nome de município: sem acentos, minúsculo, só letras, dígitos e espaços.
+
+    Ex.: "SANTA BÁRBARA D'OESTE" -> "santa barbara d oeste"
+    """
+    text = unidecode.unidecode(str(name)).lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def trigrams(text: str) -> set:
+    """Trigramas do texto normalizado, com dois espaços no início e um no fim de cada palavra."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class CityMatcher:
+    """
+    Índice de trigramas sobre os nomes normalizados dos municípios.
+
+    Construído uma vez na carga dos dados. Cada consulta percorre apenas as
+    listas de postings dos seus trigramas, ou seja, só os nomes candidatos,
+    e nunca as linhas de coleta.
+    """
+
+    def __init__(self, names):
+        """
+        Args:
+            names (Iterable[str]): Nomes de municípios; a posição de cada nome é o seu id
+        """
+        self.names = list(names)
+        self.normalized = [normalize_city(name) for name in self.names]
+        self._exact = {}
+        self._trigram_counts = []
+        self._postings = {}
+        for city_id, norm in enumerate(self.normalized):
+            self._exact.setdefault(norm, []).append(city_id)
+            grams = trigrams(norm)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(city_id)
+
+    def candidates(self, query: str, limit: int = 10, min_similarity: float = MIN_SIMILARITY,
+                   allowed=None) -> list:
+        """
+        Lista os municípios mais parecidos com a consulta, do melhor para o pior.
+
+        A pontuação é 1.0 para o nome exato (após normalização), PREFIX_SCORE para
+        nomes que começam com a consulta e a similaridade de trigramas (Jaccard)
+        nos demais casos. Empates são ordenados pelo nome normalizado.
+
+        Args:
+            query (str): Texto digitado pelo usuário
+            limit (int): Número máximo de candidatos
+            min_similarity (float): Similaridade mínima para candidatos aproximados
+            allowed (set[int] | None): Restringe os candidatos a esses ids (ex.: cidades de um estado)
+
+        Returns:
+            list[tuple[int, float]]: Pares (id do município, pontuação)
+        """
+        norm = normalize_city(query)
+        if not norm:
+            return []
+        query_grams = trigrams(norm)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+
+        scored = []
+        for city_id, common in shared.items():
+            if allowed is not None and city_id not in allowed:
+                continue
+            similarity = common / (len(query_grams) + self._trigram_counts[city_id] - common)
+            candidate = self.normalized[city_id]
+            if candidate == norm:
+                score = 1.0
+            elif candidate.startswith(norm):
+                score = PREFIX_SCORE
+            elif similarity >= min_similarity:
+                score = similarity
+            else:
+                continue
+            scored.append((city_id, score))
+        scored.sort(key=lambda item: (-item[1], self.normalized[item[0]]))
+        return scored[:limit]
+
+    def match(self, query: str, allowed=None) -> list:
+        """
+        Resolve a consulta para os municípios usados nos filtros.
+
+        Usa os nomes exatos (após normalização) quando existem; senão, todos os
+        nomes que começam com a consulta (ex.: "rio" -> RIO BRANCO, RIO DE JANEIRO...);
+        só sem prefixos, para erros de digitação, o(s) candidato(s) aproximado(s)
+        com a melhor similaridade.
+
+        Args:
+            query (str): Nome do município, possivelmente sem acentos ou com erros
+            allowed (set[int] | None): Restringe os candidatos a esses ids
+
+        Returns:
+            list[int]: Ids dos municípios (vazia se nenhum candidato for aceito)
+        """
+        norm = normalize_city(query)
+        exact = [
+            city_id for city_id in self._exact.get(norm, ())
+            if allowed is None or city_id in allowed
+        ]
+        if exact:
+            return exact
+        ranked = self.candidates(query, limit=len(self.names), allowed=allowed)
+        prefixed = [city_id for city_id, _ in ranked if self.normalized[city_id].startswith(norm)]
+        if prefixed:
+            return prefixed
+        if not ranked:
+            return []
+        best = ranked[0][1]
+        return [city_id for city_id, score in ranked if score == best]
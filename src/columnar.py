@@ -0,0 +1,132 @@
+"""
+Formatos de resposta da busca: JSON (linhas) e formatos colunares (Arrow IPC e MessagePack).
+"""
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_MIMETYPE = 'application/json'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Valores aceitos em ?format= para forçar o formato sem cabeçalho Accept
+FORMAT_MIMETYPES = {
+    'json': JSON_MIMETYPE,
+    'arrow': ARROW_MIMETYPE,
+    'msgpack': MSGPACK_MIMETYPE,
+}
+
+# Colunas da resposta de busca, na mesma ordem e com os mesmos nomes do JSON
+SEARCH_COLUMNS = [
+    'municipio', 'estado', 'revenda', 'cnpj', 'endereco', 'cep',
+    'preco', 'data_coleta', 'bandeira', 'preco_suspeito',
+]
+
+
+def available_mimetypes() -> list:
+    """Tipos de resposta suportados neste ambiente (JSON sempre primeiro)."""
+    mimetypes = [JSON_MIMETYPE]
+    if PYARROW_AVAILABLE:
+        mimetypes.append(ARROW_MIMETYPE)
+    if MSGPACK_AVAILABLE:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    return mimetypes
+
+
+def search_columns(df: pd.DataFrame) -> dict:
+    """
+    Extrai as colunas da resposta de busca diretamente dos arrays do DataFrame.
+
+    Args:
+        df (pd.DataFrame): Resultado desnormalizado de GLPDatabaseProcessor.search_prices
+
+    Returns:
+        dict: Nome da coluna -> array numpy (data_coleta em datetime64[D])
+    """
+    endereco = (
+        df['Nome da Rua'].astype(str) + ', ' + df['Numero Rua'].astype(str) + ' - ' + df['Bairro'].astype(str)
+    )
+    return {
+        'municipio': df['Municipio'].to_numpy(),
+        'estado': df['Estado - Sigla'].to_numpy(),
+        'revenda': df['Revenda'].to_numpy(),
+        'cnpj': df['CNPJ da Revenda'].to_numpy(),
+        'endereco': endereco.to_numpy(),
+        'cep': df['Cep'].to_numpy(),
+        'preco': df['Valor de Venda'].to_numpy(dtype='float64'),
+        'data_coleta': df['Data da Coleta'].to_numpy().astype('datetime64[D]'),
+        'bandeira': df['Bandeira'].to_numpy(),
+        'preco_suspeito': df['outlier'].to_numpy(dtype=bool),
+    }
+
+
+def _python_columns(columns: dict) -> dict:
+    """Converte os arrays para listas Python, com data no formato dd/mm/aaaa."""
+    lists = {name: columns[name].tolist() for name in SEARCH_COLUMNS if name != 'data_coleta'}
+    lists['data_coleta'] = pd.DatetimeIndex(columns['data_coleta']).strftime('%d/%m/%Y').tolist()
+    return {name: lists[name] for name in SEARCH_COLUMNS}
+
+
+def to_json_rows(columns: dict) -> list:
+    """
+    Monta a lista de registros do JSON a partir das colunas.
+
+    Returns:
+        list: Um dicionário por registro, com as chaves de SEARCH_COLUMNS
+    """
+    lists = _python_columns(columns)
+    return [dict(zip(SEARCH_COLUMNS, values)) for values in zip(*lists.values())]
+
+
+def to_msgpack(columns: dict, **fields) -> bytes:
+    """
+    Serializa a resposta em MessagePack com um array por coluna.
+
+    Args:
+        columns (dict): Saída de search_columns
+        **fields: Campos adicionais do envelope (ex.: filters_applied)
+
+    Returns:
+        bytes: {'success', 'columns', 'data': {coluna: [...]}, 'total_results', **fields}
+    """
+    lists = _python_columns(columns)
+    payload = {
+        'success': True,
+        'columns': SEARCH_COLUMNS,
+        'data': lists,
+        'total_results': len(lists['preco']),
+    }
+    payload.update(fields)
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def to_arrow_ipc(columns: dict, **metadata) -> bytes:
+    """
+    Serializa as colunas como um stream Arrow IPC (uma tabela, um record batch).
+
+    Args:
+        columns (dict): Saída de search_columns
+        **metadata: Pares chave/valor (str) gravados nos metadados do schema
+
+    Returns:
+        bytes: Stream Arrow IPC
+    """
+    table = pa.table(
+        {name: pa.array(columns[name], from_pandas=True) for name in SEARCH_COLUMNS},
+        metadata={key: str(value) for key, value in metadata.items()},
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -3,27 +3,87 @@ Módulo para processamento e filtragem dos dados de preços de GLP da ANP.
 """
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import logging
+import re
+
+from .city_matcher import CityMatcher
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Esquema do CSV da ANP usado na leitura otimizada. Apenas as colunas
+# consumidas pela aplicação são lidas; o preço é inferido como float via
+# decimal=',' e a data é convertida durante a leitura.
+CSV_TEXT_COLUMNS = {
+    'Estado - Sigla': 'str',
+    'Municipio': 'str',
+    'Revenda': 'str',
+    'CNPJ da Revenda': 'str',
+    'Nome da Rua': 'str',
+    'Numero Rua': 'str',
+    'Bairro': 'str',
+    'Cep': 'str',
+    'Produto': 'str',
+    'Bandeira': 'str',
+}
+CSV_DATE_COLUMN = 'Data da Coleta'
+CSV_PRICE_COLUMN = 'Valor de Venda'
+CSV_USECOLS = list(CSV_TEXT_COLUMNS) + [CSV_DATE_COLUMN, CSV_PRICE_COLUMN]
+CSV_ENGINES = ('c', 'pyarrow')
+
+# Tabela dimensão de revendas (uma linha por CNPJ). A tabela fato guarda só
+# o id inteiro da revenda, a data da coleta e o preço.
+RESELLER_COLUMNS = [
+    'CNPJ da Revenda', 'Revenda', 'Nome da Rua', 'Numero Rua', 'Bairro',
+    'Cep', 'Municipio', 'Estado - Sigla', 'Bandeira',
+]
+FACT_COLUMNS = ['reseller_id', 'Data da Coleta', 'Valor de Venda', 'outlier']
+
+# Preços fora de [Q1 - k*IQR, Q3 + k*IQR] do estado são marcados como suspeitos.
+# O IQR tem um piso proporcional à mediana para estados com poucas coletas.
+PRICE_OUTLIER_IQR_FACTOR = 3.0
+PRICE_OUTLIER_MIN_IQR_RATIO = 0.15
+
+
+def cnpj_key(cnpj: str) -> str:
+    """Chave de busca do CNPJ: apenas os dígitos ('61.602.199/0024-09' -> '61602199002409')."""
+    return re.sub(r'\D', '', str(cnpj))
+
 
 class GLPDatabaseProcessor:
     """Classe para processar dados de preços de GLP da ANP."""
     
-    def __init__(self, csv_file_path: str):
+    def __init__(self, csv_file_path: str, fast_ingest: bool = True, engine: str = 'c'):
         """
         Inicializa o processador de dados.
         
         Args:
             csv_file_path (str): Caminho para o arquivo CSV com dados da ANP
+            fast_ingest (bool): Usa a leitura com esquema explícito (dtypes, decimal,
+                datas e usecols) em vez da inferência padrão do pandas
+            engine (str): Engine do read_csv na leitura otimizada ('c' ou 'pyarrow')
         """
+        if engine not in CSV_ENGINES:
+            raise ValueError(f"Engine de CSV inválida: {engine}. Use uma de {CSV_ENGINES}")
         self.csv_file_path = csv_file_path
+        self.fast_ingest = fast_ingest
+        self.engine = engine
         self.df = None
         self.processed_df = None
+        self.resellers = None
+        self.reseller_ids = {}
+        self.city_matcher = None
+        self._reseller_city_codes = None
+        self.brand_cube = None
         
     def load_data(self) -> pd.DataFrame:
         """
@@ -34,13 +94,49 @@ class GLPDatabaseProcessor:
         """
         try:
             logger.info(f"Carregando dados de: {self.csv_file_path}")
-            self.df = pd.read_csv(self.csv_file_path, sep=';', encoding='utf-8')
+            if self.fast_ingest:
+                self.df = self._read_csv_with_schema()
+            else:
+                self.df = pd.read_csv(self.csv_file_path, sep=';', encoding='utf-8')
             logger.info(f"Dados carregados com sucesso. Shape: {self.df.shape}")
             return self.df
         except Exception as e:
             logger.error(f"Erro ao carregar dados: {e}")
             raise
     
+    def _read_csv_with_schema(self) -> pd.DataFrame:
+        """
+        Lê o CSV com esquema explícito, tratando BOM, decimal e datas na leitura.
+        
+        Returns:
+            pd.DataFrame: DataFrame com preço em float e data em datetime
+        """
+        engine = self.engine
+        if engine == 'pyarrow' and not PYARROW_AVAILABLE:
+            logger.warning("pyarrow não está instalado; usando a engine 'c' para ler o CSV")
+            engine = 'c'
+        
+        options = {
+            'sep': ';',
+            'encoding': 'utf-8-sig',
+            'usecols': CSV_USECOLS,
+            'dtype': CSV_TEXT_COLUMNS,
+            'decimal': ',',
+            'parse_dates': [CSV_DATE_COLUMN],
+            'date_format': '%d/%m/%Y',
+            'engine': engine,
+        }
+        if engine == 'c':
+            # Remove espaços iniciais dos campos (ex.: CNPJ ' 61.602.199/0024-09') durante o parse
+            options['skipinitialspace'] = True
+        
+        df = pd.read_csv(self.csv_file_path, **options)
+        if engine == 'pyarrow':
+            # A engine pyarrow não suporta skipinitialspace: mesmo tratamento após a leitura
+            for column in CSV_TEXT_COLUMNS:
+                df[column] = df[column].str.lstrip()
+        return df
+    
     def clean_data(self) -> pd.DataFrame:
         """
         Limpa e prepara os dados para análise.
@@ -53,18 +149,20 @@ class GLPDatabaseProcessor:
         
         logger.info("Iniciando limpeza dos dados...")
         
-        # Converter coluna de data
-        self.df['Data da Coleta'] = pd.to_datetime(self.df['Data da Coleta'], format='%d/%m/%Y', errors='coerce')
+        # Converter coluna de data (já convertida na leitura otimizada, salvo valores inválidos)
+        if not pd.api.types.is_datetime64_any_dtype(self.df['Data da Coleta']):
+            self.df['Data da Coleta'] = pd.to_datetime(self.df['Data da Coleta'], format='%d/%m/%Y', errors='coerce')
         
-        # Converter coluna de preço para numérico
-        self.df['Valor de Venda'] = pd.to_numeric(
-            self.df['Valor de Venda'].str.replace(',', '.'), 
-            errors='coerce'
-        )
+        # Converter coluna de preço para numérico (idem)
+        if not pd.api.types.is_numeric_dtype(self.df['Valor de Venda']):
+            self.df['Valor de Venda'] = pd.to_numeric(
+                self.df['Valor de Venda'].astype(str).str.replace(',', '.'), 
+                errors='coerce'
+            )
         
         # Remover linhas com dados inválidos
         initial_rows = len(self.df)
-        self.df = self.df.dropna(subset=['Data da Coleta', 'Valor de Venda', 'Municipio'])
+        self.df = self.df.dropna(subset=['Data da Coleta', 'Valor de Venda', 'Municipio', 'CNPJ da Revenda'])
         
         # Filtrar apenas GLP 13kg
         self.df = self.df[self.df['Produto'] == 'GLP']
@@ -73,8 +171,327 @@ class GLPDatabaseProcessor:
         self.df = self.df.drop_duplicates()
         
         logger.info(f"Limpeza concluída. Linhas removidas: {initial_rows - len(self.df)}")
+        
+        # Normalizar revendas: dimensão por CNPJ + tabela fato compacta
+        self.build_reseller_table()
+        
+        # Marcar preços suspeitos (ex.: 1150,00 digitado no lugar de 115,00)
+        self.flag_price_outliers()
+        
+        # Cubo estado x cidade x bandeira x semana para comparar bandeiras
+        self.build_brand_cube()
         return self.df
     
+    def build_reseller_table(self) -> pd.DataFrame:
+        """
+        Separa os dados limpos em uma tabela dimensão de revendas e uma tabela fato.
+        
+        A dimensão (self.resellers) tem uma linha por CNPJ, indexada por um id
+        inteiro sequencial, com os atributos da coleta mais recente. A tabela
+        fato (self.df) passa a conter apenas FACT_COLUMNS.
+        
+        Returns:
+            pd.DataFrame: Tabela dimensão de revendas
+        """
+        wide = self.df
+        codes, cnpjs = pd.factorize(wide['CNPJ da Revenda'])
+        
+        # Atributos e último preço de cada revenda vêm da coleta mais recente
+        latest_order = wide['Data da Coleta'].to_numpy().argsort(kind='stable')
+        self.resellers = (
+            wide[RESELLER_COLUMNS + ['Data da Coleta', 'Valor de Venda']]
+            .assign(reseller_id=codes)
+            .iloc[latest_order]
+            .drop_duplicates('reseller_id', keep='last')
+            .set_index('reseller_id')
+            .sort_index()
+        )
+        self.reseller_ids = {cnpj_key(cnpj): reseller_id for reseller_id, cnpj in enumerate(cnpjs)}
+        
+        # Índice de trigramas dos municípios; cada revenda aponta para o id do seu município
+        self._reseller_city_codes, city_names = pd.factorize(self.resellers['Municipio'])
+        self.city_matcher = CityMatcher(city_names)
+        
+        self.df = pd.DataFrame({
+            'reseller_id': codes.astype('int32'),
+            'Data da Coleta': wide['Data da Coleta'].to_numpy(),
+            'Valor de Venda': wide['Valor de Venda'].to_numpy(),
+        })
+        
+        logger.info(f"Revendas normalizadas: {len(self.resellers)} CNPJs para {len(self.df)} coletas")
+        if logger.isEnabledFor(logging.DEBUG):
+            # memory_usage(deep=True) percorre cada string: caro em arquivos grandes
+            wide_mb = wide.memory_usage(deep=True).sum() / 1024 / 1024
+            normalized_mb = (self.df.memory_usage(deep=True).sum() + self.resellers.memory_usage(deep=True).sum()) / 1024 / 1024
+            logger.debug(f"Memória: {wide_mb:.1f} MB -> {normalized_mb:.1f} MB")
+        return self.resellers
+    
+    def flag_price_outliers(self, iqr_factor: float = PRICE_OUTLIER_IQR_FACTOR) -> pd.Series:
+        """
+        Marca na tabela fato os preços atípicos para o estado da revenda.
+        
+        Usa uma única agregação agrupada (quartis e mediana por estado) e
+        compara cada linha com os limites do seu estado de forma vetorizada.
+        
+        Args:
+            iqr_factor (float): Multiplicador do IQR para os limites inferior e superior
+            
+        Returns:
+            pd.Series: Máscara booleana (coluna 'outlier' da tabela fato)
+        """
+        state_codes, states = pd.factorize(self.resellers['Estado - Sigla'])
+        row_state = state_codes[self.df['reseller_id'].to_numpy()]
+        prices = self.df['Valor de Venda']
+        
+        quantiles = (
+            prices.groupby(row_state).quantile([0.25, 0.5, 0.75])
+            .unstack()
+            .reindex(range(len(states)))
+        )
+        q1, median, q3 = (quantiles[q].to_numpy() for q in (0.25, 0.5, 0.75))
+        iqr = np.maximum(q3 - q1, PRICE_OUTLIER_MIN_IQR_RATIO * median)
+        lower = (q1 - iqr_factor * iqr)[row_state]
+        upper = (q3 + iqr_factor * iqr)[row_state]
+        
+        values = prices.to_numpy()
+        self.df['outlier'] = (values <= 0) | (values < lower) | (values > upper)
+        logger.info(f"Preços suspeitos marcados: {int(self.df['outlier'].sum())} de {len(self.df)}")
+        return self.df['outlier']
+    
+    def build_brand_cube(self) -> pd.DataFrame:
+        """
+        Agrega a tabela fato em um cubo estado x cidade x bandeira x semana.
+        
+        Uma única agregação agrupada sobre os códigos inteiros das dimensões;
+        preços marcados como suspeitos ficam de fora. O cubo guarda contagem,
+        soma e mínimo, para que qualquer fatia possa ser reagregada sem voltar
+        às linhas de coleta.
+        
+        Returns:
+            pd.DataFrame: Colunas state, city, brand, week, count, sum, min
+        """
+        facts = self.df[~self.df['outlier'].to_numpy()]
+        reseller_ids = facts['reseller_id'].to_numpy()
+        state_codes, states = pd.factorize(self.resellers['Estado - Sigla'])
+        brand_codes, brands = pd.factorize(self.resellers['Bandeira'].fillna('SEM BANDEIRA'))
+        
+        cube = pd.DataFrame({
+            'state': state_codes[reseller_ids],
+            'city': self._reseller_city_codes[reseller_ids],
+            'brand': brand_codes[reseller_ids],
+            'week': facts['Data da Coleta'].dt.to_period('W').dt.start_time.to_numpy(),
+            'price': facts['Valor de Venda'].to_numpy(),
+        }).groupby(['state', 'city', 'brand', 'week']).agg(
+            count=('price', 'size'),
+            sum=('price', 'sum'),
+            min=('price', 'min'),
+        ).reset_index()
+        
+        cube['state'] = pd.Categorical.from_codes(cube['state'], categories=states)
+        cube['city'] = pd.Categorical.from_codes(cube['city'], categories=self.city_matcher.names)
+        cube['brand'] = pd.Categorical.from_codes(cube['brand'], categories=brands)
+        self.brand_cube = cube
+        logger.info(f"Cubo de bandeiras montado: {len(cube)} células para {len(self.df)} coletas")
+        return cube
+    
+    def get_brand_comparison(self, state: str = '', city: str = '', brands=None, weeks: int = 4) -> dict:
+        """
+        Compara bandeiras (Bandeira) a partir de uma fatia do cubo.
+        
+        Args:
+            state (str): Sigla do estado
+            city (str): Nome da cidade (ver match_cities)
+            brands (list[str] | None): Trechos de nomes de bandeiras (sem diferenciar maiúsculas)
+            weeks (int): Número de semanas mais recentes
+            
+        Returns:
+            dict: {'weeks': [...], 'brands': [{'bandeira', 'total_records', 'avg_price',
+                  'min_price', 'history': [...]}]}, bandeiras da mais barata para a mais cara
+        """
+        cube = self.brand_cube
+        mask = np.ones(len(cube), dtype=bool)
+        if state:
+            mask &= (cube['state'] == state.upper()).to_numpy()
+        if city:
+            mask &= cube['city'].isin(self.match_cities(city, state)).to_numpy()
+        if brands:
+            tokens = [brand.strip().upper() for brand in brands if brand.strip()]
+            labels = [label for label in cube['brand'].cat.categories
+                      if any(token in label.upper() for token in tokens)]
+            mask &= cube['brand'].isin(labels).to_numpy()
+        
+        last_weeks = sorted(cube['week'].unique())[-weeks:]
+        cells = cube[mask & cube['week'].isin(last_weeks).to_numpy()]
+        
+        by_week = cells.groupby(['brand', 'week'], observed=True).agg(
+            count=('count', 'sum'), sum=('sum', 'sum'), min=('min', 'min')
+        )
+        by_brand = by_week.groupby(level='brand', observed=True).agg(
+            count=('count', 'sum'), sum=('sum', 'sum'), min=('min', 'min')
+        )
+        by_brand['avg'] = by_brand['sum'] / by_brand['count']
+        
+        result = []
+        for brand, row in by_brand.sort_values('avg').iterrows():
+            history = by_week.loc[brand]
+            result.append({
+                'bandeira': brand,
+                'total_records': int(row['count']),
+                'avg_price': float(row['avg']),
+                'min_price': float(row['min']),
+                'history': [
+                    {
+                        'week': week.strftime('%d/%m'),
+                        'count': int(cell['count']),
+                        'avg_price': float(cell['sum'] / cell['count']),
+                        'min_price': float(cell['min']),
+                    }
+                    for week, cell in history.iterrows()
+                ],
+            })
+        return {
+            'weeks': [pd.Timestamp(week).strftime('%d/%m') for week in last_weeks],
+            'brands': result,
+        }
+    
+    def get_reseller(self, cnpj: str):
+        """
+        Busca uma revenda pelo CNPJ (com ou sem pontuação) em O(1).
+        
+        Args:
+            cnpj (str): CNPJ da revenda
+            
+        Returns:
+            pd.Series | None: Atributos da revenda, incluindo a coleta mais recente
+        """
+        reseller_id = self.reseller_ids.get(cnpj_key(cnpj))
+        if reseller_id is None:
+            return None
+        return self.resellers.loc[reseller_id]
+    
+    def denormalize(self, facts: pd.DataFrame) -> pd.DataFrame:
+        """
+        Junta os atributos da revenda às linhas da tabela fato.
+        
+        Args:
+            facts (pd.DataFrame): Subconjunto da tabela fato
+            
+        Returns:
+            pd.DataFrame: Linhas com as colunas originais do CSV
+        """
+        return facts.join(self.resellers[RESELLER_COLUMNS], on='reseller_id')
+    
+    def match_cities(self, city: str, state: str = '') -> list:
+        """
+        Resolve o nome digitado para os municípios do dataset (acentos e erros tolerados).
+        
+        Usa o nome exato após normalização quando existe; senão, todos os
+        municípios que começam com o texto digitado e, na falta deles, o
+        candidato mais parecido do índice de trigramas.
+        
+        Args:
+            city (str): Nome do município
+            state (str): Sigla do estado que restringe os candidatos
+            
+        Returns:
+            list: Nomes dos municípios correspondentes
+        """
+        city_ids = self.city_matcher.match(city, allowed=self._cities_in_state(state))
+        return [self.city_matcher.names[city_id] for city_id in city_ids]
+    
+    def suggest_cities(self, query: str, limit: int = 10) -> list:
+        """
+        Sugestões de municípios ordenadas por relevância.
+        
+        Args:
+            query (str): Texto digitado
+            limit (int): Número máximo de sugestões
+            
+        Returns:
+            list: Dicionários {'municipio', 'score'}
+        """
+        return [
+            {'municipio': self.city_matcher.names[city_id], 'score': round(score, 3)}
+            for city_id, score in self.city_matcher.candidates(query, limit=limit)
+        ]
+    
+    def _cities_in_state(self, state: str):
+        """Ids (do CityMatcher) dos municípios com revendas no estado, ou None sem estado."""
+        if not state:
+            return None
+        in_state = (self.resellers['Estado - Sigla'] == state.upper()).to_numpy()
+        return set(np.unique(self._reseller_city_codes[in_state]).tolist())
+    
+    def _city_mask(self, city: str, state: str = '') -> pd.Series:
+        """Máscara sobre a dimensão de revendas para os municípios que casam com `city`."""
+        city_ids = self.city_matcher.match(city, allowed=self._cities_in_state(state))
+        return pd.Series(np.isin(self._reseller_city_codes, city_ids), index=self.resellers.index)
+    
+    def _active_resellers(self) -> pd.DataFrame:
+        """Revendas com ao menos uma coleta em processed_df."""
+        ids = np.unique(self.processed_df['reseller_id'].to_numpy())
+        return self.resellers.iloc[ids]
+    
+    def _facts_for_resellers(self, mask: pd.Series) -> pd.DataFrame:
+        """Linhas de processed_df cujas revendas satisfazem a máscara sobre a dimensão."""
+        selected = mask.to_numpy()[self.processed_df['reseller_id'].to_numpy()]
+        return self.processed_df[selected]
+    
+    def subset(self, city: str = '', state: str = '', trimmed: bool = False) -> 'GLPDatabaseProcessor':
+        """
+        Cria um processador restrito a uma cidade e/ou estado, compartilhando a dimensão.
+        
+        Args:
+            city (str): Nome da cidade (ver match_cities)
+            state (str): Sigla do estado
+            trimmed (bool): Se True, descarta os preços marcados como suspeitos
+            
+        Returns:
+            GLPDatabaseProcessor: Processador com processed_df filtrado
+        """
+        if self.processed_df is None:
+            self.get_latest_prices_by_city()
+        mask = pd.Series(True, index=self.resellers.index)
+        if city:
+            mask &= self._city_mask(city, state)
+        if state:
+            mask &= self.resellers['Estado - Sigla'] == state.upper()
+        
+        processor = GLPDatabaseProcessor(self.csv_file_path, fast_ingest=self.fast_ingest, engine=self.engine)
+        processor.resellers = self.resellers
+        processor.reseller_ids = self.reseller_ids
+        processor.city_matcher = self.city_matcher
+        processor._reseller_city_codes = self._reseller_city_codes
+        facts = self._facts_for_resellers(mask)
+        if trimmed:
+            facts = facts[~facts['outlier'].to_numpy()]
+        processor.df = processor.processed_df = facts
+        return processor
+    
+    def search_prices(self, city: str = '', state: str = '', limit: int = 50) -> pd.DataFrame:
+        """
+        Busca as coletas mais recentes para uma cidade e/ou estado.
+        
+        Args:
+            city (str): Nome da cidade (ver match_cities)
+            state (str): Sigla do estado
+            limit (int): Número máximo de registros
+            
+        Returns:
+            pd.DataFrame: Registros desnormalizados, do mais recente para o mais antigo
+        """
+        if self.processed_df is None:
+            self.get_latest_prices_by_city()
+        mask = pd.Series(True, index=self.resellers.index)
+        if state:
+            mask &= self.resellers['Estado - Sigla'] == state.upper()
+        if city:
+            mask &= self._city_mask(city, state)
+        
+        facts = self._facts_for_resellers(mask)
+        facts = facts.sort_values('Data da Coleta', ascending=False, kind='stable').head(limit)
+        return self.denormalize(facts)
+    
     def filter_by_date_range(self, days_back: int = 30) -> pd.DataFrame:
         """
         Filtra dados por período mais recente.
@@ -113,10 +530,10 @@ class GLPDatabaseProcessor:
         if self.processed_df is None:
             self.filter_by_date_range()
         
-        # Agrupar por cidade e obter o registro mais recente
-        latest_prices = self.processed_df.sort_values('Data da Coleta').groupby(
-            ['Municipio', 'Estado - Sigla', 'Revenda']
-        ).tail(1).reset_index(drop=True)
+        # Agrupar por revenda (CNPJ) e obter o registro mais recente
+        latest_prices = self.denormalize(
+            self.processed_df.sort_values('Data da Coleta', kind='stable').groupby('reseller_id').tail(1)
+        ).reset_index(drop=True)
         
         logger.info(f"Preços mais recentes obtidos para {len(latest_prices)} registros")
         return latest_prices
@@ -131,7 +548,7 @@ class GLPDatabaseProcessor:
         if self.processed_df is None:
             self.get_latest_prices_by_city()
         
-        cities = self.processed_df['Municipio'].unique().tolist()
+        cities = self._active_resellers()['Municipio'].unique().tolist()
         cities.sort()
         return cities
     
@@ -145,7 +562,7 @@ class GLPDatabaseProcessor:
         if self.processed_df is None:
             self.get_latest_prices_by_city()
         
-        states = self.processed_df['Estado - Sigla'].unique().tolist()
+        states = self._active_resellers()['Estado - Sigla'].unique().tolist()
         states.sort()
         return states
     
@@ -162,9 +579,7 @@ class GLPDatabaseProcessor:
         if self.processed_df is None:
             self.get_latest_prices_by_city()
         
-        filtered_df = self.processed_df[
-            self.processed_df['Municipio'].str.contains(city, case=False, na=False)
-        ].copy()
+        filtered_df = self.denormalize(self._facts_for_resellers(self._city_mask(city)))
         
         logger.info(f"Filtro por cidade '{city}' aplicado. Registros encontrados: {len(filtered_df)}")
         return filtered_df
@@ -182,9 +597,9 @@ class GLPDatabaseProcessor:
         if self.processed_df is None:
             self.get_latest_prices_by_city()
         
-        filtered_df = self.processed_df[
-            self.processed_df['Estado - Sigla'] == state.upper()
-        ].copy()
+        filtered_df = self.denormalize(self._facts_for_resellers(
+            self.resellers['Estado - Sigla'] == state.upper()
+        ))
         
         logger.info(f"Filtro por estado '{state}' aplicado. Registros encontrados: {len(filtered_df)}")
         return filtered_df
@@ -197,26 +612,28 @@ class GLPDatabaseProcessor:
         """
         if self.processed_df is None:
             self.get_latest_prices_by_city()
-        df = self.processed_df.copy()
-        df['week'] = df['Data da Coleta'].dt.to_period('W').apply(lambda r: r.start_time)
-        # Ordenar por semana
-        week_groups = df.groupby('week')
-        # Pegar as últimas N semanas
-        last_weeks = sorted(df['week'].unique())[-weeks:]
+        reseller_ids = self.processed_df['reseller_id'].to_numpy()
+        df = pd.DataFrame({
+            'week': self.processed_df['Data da Coleta'].dt.to_period('W').dt.start_time,
+            'price': self.processed_df['Valor de Venda'],
+            'reseller_id': reseller_ids,
+            'city': self.resellers['Municipio'].to_numpy()[reseller_ids],
+            'state': self.resellers['Estado - Sigla'].to_numpy()[reseller_ids],
+        })
+        # Agregar por semana e pegar as últimas N semanas
+        weekly = df.groupby('week').agg(
+            avg_price=('price', 'mean'),
+            total_cities=('city', 'nunique'),
+            total_companies=('reseller_id', 'nunique'),
+            total_states=('state', 'nunique'),
+        ).sort_index().tail(weeks)
         history = {
-            'dates': [],
-            'avg_price': [],
-            'total_cities': [],
-            'total_companies': [],
-            'total_states': []
+            'dates': [week.strftime('%d/%m') for week in weekly.index],
+            'avg_price': weekly['avg_price'].tolist(),
+            'total_cities': weekly['total_cities'].tolist(),
+            'total_companies': weekly['total_companies'].tolist(),
+            'total_states': weekly['total_states'].tolist()
         }
-        for week in last_weeks:
-            week_df = week_groups.get_group(week)
-            history['dates'].append(week.strftime('%d/%m'))
-            history['avg_price'].append(week_df['Valor de Venda'].mean())
-            history['total_cities'].append(week_df['Municipio'].nunique())
-            history['total_companies'].append(week_df['Revenda'].nunique())
-            history['total_states'].append(week_df['Estado - Sigla'].nunique())
         return history
 
     def get_kpi_variations(self, history):
@@ -250,6 +667,7 @@ class GLPDatabaseProcessor:
         if self.processed_df.empty:
             return {
                 'total_records': 0,
+                'outlier_records': 0,
                 'min_price': None,
                 'max_price': None,
                 'latest_date': None,
@@ -266,6 +684,7 @@ class GLPDatabaseProcessor:
         oldest_date = self.processed_df['Data da Coleta'].min()
         stats = {
             'total_records': len(self.processed_df),
+            'outlier_records': int(self.processed_df['outlier'].sum()),
             'min_price': self.processed_df['Valor de Venda'].min(),
             'max_price': self.processed_df['Valor de Venda'].max(),
             'latest_date': latest_date.strftime('%d/%m/%Y') if pd.notnull(latest_date) else None,
@@ -301,18 +720,19 @@ class GLPDatabaseProcessor:
         return stats
 
 
-def process_glp_data(csv_file_path: str, days_back: int = 30) -> GLPDatabaseProcessor:
+def process_glp_data(csv_file_path: str, days_back: int = 30, engine: str = 'c') -> GLPDatabaseProcessor:
     """
     Função conveniente para processar dados de GLP.
     
     Args:
         csv_file_path (str): Caminho para o arquivo CSV
         days_back (int): Número de dias para trás
+        engine (str): Engine do read_csv ('c' ou 'pyarrow')
         
     Returns:
         GLPDatabaseProcessor: Processador com dados carregados e processados
     """
-    processor = GLPDatabaseProcessor(csv_file_path)
+    processor = GLPDatabaseProcessor(csv_file_path, engine=engine)
     processor.load_data()
     processor.clean_data()
     processor.filter_by_date_range(days_back)
@@ -0,0 +1,125 @@
+"""
+Controle de carga das rotas da API: coalescência de consultas idênticas e limite de taxa por cliente.
+"""
+
+import threading
+import time
+
+
+class _InFlightCall:
+    """Consulta em andamento compartilhada entre as requisições que aguardam."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Executa uma única vez as consultas idênticas que chegam ao mesmo tempo.
+
+    A primeira requisição com uma chave calcula o resultado; as demais que
+    chegam enquanto o cálculo está em andamento esperam e recebem o mesmo
+    resultado (ou a mesma exceção). Nada fica em cache após a conclusão.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Executa fn() para a chave, ou aguarda a execução já em andamento.
+
+        Args:
+            key (hashable): Identificador da consulta (rota + parâmetros normalizados)
+            fn (callable): Função sem argumentos que calcula o resultado
+
+        Returns:
+            Resultado de fn(), compartilhado entre todas as requisições coalescidas
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Número de consultas distintas em andamento."""
+        with self._lock:
+            return len(self._calls)
+
+
+class TokenBucketLimiter:
+    """
+    Limite de taxa por cliente usando token bucket.
+
+    Cada cliente tem um balde com capacidade `burst` que é reabastecido a
+    `rate` tokens por segundo; cada requisição consome um token.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        """
+        Args:
+            rate (float): Tokens reabastecidos por segundo
+            burst (int): Capacidade do balde (rajada máxima)
+            max_clients (int): Número de baldes mantidos antes de descartar os ociosos
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate deve ser positivo e burst maior ou igual a 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def allow(self, client_id):
+        """
+        Consome um token do cliente, se disponível.
+
+        Args:
+            client_id (str): Identificador do cliente (ex.: endereço IP)
+
+        Returns:
+            tuple[bool, float]: (permitido, segundos até o próximo token)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[client_id] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[client_id] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / self.rate
+            if len(self._buckets) > self.max_clients:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        """Descarta os baldes que já estariam cheios (clientes ociosos)."""
+        idle = [
+            client_id for client_id, (tokens, last) in self._buckets.items()
+            if tokens + (now - last) * self.rate >= self.burst
+        ]
+        for client_id in idle:
+            del self._buckets[client_id]
@@ -13,6 +13,14 @@ sys.path.insert(0, str(src_path))
 
 from src.data_processor import process_glp_data, GLPDatabaseProcessor
 
+SAMPLE_CSV_PATH = str(Path(__file__).parent.parent / "data" / "ultimas-4-semanas-glp.csv")
+
+
+def _testing_client():
+    """Cliente de teste do Flask com os dados de exemplo carregados de forma síncrona."""
+    from src.app import create_app
+    return create_app('testing').test_client()
+
 def test_data_processor():
     """Testa o processador de dados."""
     print("🧪 Testando processador de dados...")
@@ -67,6 +75,28 @@ def test_data_processor():
             if len(state_data) > 0:
                 print(f"   Primeiro registro: {state_data.iloc[0]['Municipio']} - R$ {state_data.iloc[0]['Valor de Venda']}")
         
+        # Testar busca aproximada de cidades (acentos e erros de digitação)
+        print("\n🔤 Testando busca aproximada de cidades...")
+        for query in ['sao paolo', 'SÃO PAULO', 'belo horisonte']:
+            print(f"   '{query}' -> {processor.match_cities(query)} | sugestões: {processor.suggest_cities(query, limit=3)}")
+        
+        # Testar cubo de bandeiras
+        comparison = processor.get_brand_comparison(brands=['ULTRAGAZ', 'SUPERGASBRAS'])
+        print(f"\n⛽ Comparação de bandeiras ({', '.join(comparison['weeks'])}):")
+        for brand in comparison['brands']:
+            print(f"   {brand['bandeira']}: média R$ {brand['avg_price']:.2f}, mínimo R$ {brand['min_price']:.2f} ({brand['total_records']} coletas)")
+        
+        # Testar dimensão de revendas (CNPJ -> atributos)
+        print(f"\n🏪 Revendas únicas por CNPJ: {len(processor.resellers)}")
+        first_cnpj = processor.resellers['CNPJ da Revenda'].iloc[0]
+        reseller = processor.get_reseller(first_cnpj)
+        print(f"   {first_cnpj}: {reseller['Revenda']} - {reseller['Municipio']}/{reseller['Estado - Sigla']}")
+        
+        # Testar marcação de preços suspeitos
+        print(f"\n🚩 Preços suspeitos: {stats['outlier_records']} de {stats['total_records']}")
+        trimmed_stats = processor.subset(trimmed=True).get_summary_stats()
+        print(f"   Faixa de preço sem suspeitos: R$ {trimmed_stats['min_price']} - R$ {trimmed_stats['max_price']}")
+        
         print("\n✅ Todos os testes passaram!")
         return True
         
@@ -85,9 +115,8 @@ def test_api_endpoints():
         # Importar app
         from src.app import create_app
         
-        # Criar app de teste
-        app = create_app()
-        app.config['TESTING'] = True
+        # Criar app de teste (carregamento síncrono dos dados)
+        app = create_app('testing')
         
         with app.test_client() as client:
             # Testar endpoint principal
@@ -98,10 +127,22 @@ def test_api_endpoints():
             response = client.get('/api/search?limit=5')
             print(f"   GET /api/search - Status: {response.status_code}")
             
+            # Testar busca em formato colunar (se pyarrow/msgpack estiverem instalados)
+            response = client.get('/api/search?limit=5', headers={'Accept': 'application/vnd.apache.arrow.stream'})
+            print(f"   GET /api/search (Accept: Arrow) - Status: {response.status_code} - {response.mimetype}")
+            
             # Testar endpoint de cidades
             response = client.get('/api/cities')
             print(f"   GET /api/cities - Status: {response.status_code}")
             
+            # Testar sugestões de cidades
+            response = client.get('/api/cities/suggest?q=sao paolo')
+            print(f"   GET /api/cities/suggest - Status: {response.status_code}")
+            
+            # Testar comparação de bandeiras
+            response = client.get('/api/brands?state=SP&brands=ULTRAGAZ,SUPERGASBRAS')
+            print(f"   GET /api/brands - Status: {response.status_code}")
+            
             # Testar endpoint de estados
             response = client.get('/api/states')
             print(f"   GET /api/states - Status: {response.status_code}")
@@ -110,9 +151,20 @@ def test_api_endpoints():
             response = client.get('/api/stats')
             print(f"   GET /api/stats - Status: {response.status_code}")
             
+            # Testar endpoint de revenda por CNPJ
+            response = client.get('/api/reseller/61.602.199/0024-09')
+            print(f"   GET /api/reseller/<cnpj> - Status: {response.status_code}")
+            
             # Testar endpoint about
             response = client.get('/about')
             print(f"   GET /about - Status: {response.status_code}")
+            
+            # Testar liveness e readiness
+            response = client.get('/healthz')
+            print(f"   GET /healthz - Status: {response.status_code}")
+            
+            response = client.get('/readyz')
+            print(f"   GET /readyz - Status: {response.status_code} - {response.get_json()}")
         
         print("✅ Testes da API concluídos!")
         return True
@@ -123,6 +175,501 @@ def test_api_endpoints():
         traceback.print_exc()
         return False
 
+def test_throttling():
+    """Testa a coalescência de consultas e o limite de taxa."""
+    print("\n🚦 Testando controle de carga...")
+    print("=" * 50)
+    
+    import threading
+    import time
+    from src.throttling import SingleFlight, TokenBucketLimiter
+    
+    # Requisições idênticas simultâneas devem gerar um único cálculo
+    single_flight = SingleFlight()
+    calls = []
+    results = []
+    
+    def slow_query():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'success': True}
+    
+    threads = [threading.Thread(target=lambda: results.append(single_flight.do('stats', slow_query)))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"   10 requisições idênticas -> {len(calls)} cálculo(s)")
+    assert len(results) == 10
+    assert len(calls) == 1
+    
+    # Token bucket: rajada de 3, depois bloqueia
+    limiter = TokenBucketLimiter(rate=1, burst=3)
+    allowed = [limiter.allow('127.0.0.1')[0] for _ in range(4)]
+    print(f"   Rajada de 4 com burst=3: {allowed}")
+    assert allowed == [True, True, True, False]
+    assert limiter.allow('10.0.0.1')[0]
+
+
+def test_csv_engines_read_same_values():
+    """As engines c e pyarrow produzem os mesmos valores (BOM, decimal, datas e espaços iniciais)."""
+    import pytest
+    import pandas as pd
+    pytest.importorskip('pyarrow')
+    
+    c_df = GLPDatabaseProcessor(SAMPLE_CSV_PATH, engine='c').load_data()
+    arrow_df = GLPDatabaseProcessor(SAMPLE_CSV_PATH, engine='pyarrow').load_data()[c_df.columns]
+    arrow_df['Data da Coleta'] = arrow_df['Data da Coleta'].astype(c_df['Data da Coleta'].dtype)
+    
+    assert not c_df['CNPJ da Revenda'].str.startswith(' ').any()
+    pd.testing.assert_frame_equal(c_df, arrow_df)
+
+
+def test_reseller_dimension():
+    """A tabela fato guarda só ids, data, preço e flag; a dimensão tem um CNPJ por linha."""
+    processor = process_glp_data(SAMPLE_CSV_PATH, days_back=30)
+    
+    assert list(processor.processed_df.columns) == ['reseller_id', 'Data da Coleta', 'Valor de Venda', 'outlier']
+    assert processor.resellers['CNPJ da Revenda'].is_unique
+    assert len(processor.resellers) == processor.df['reseller_id'].nunique()
+    assert processor.resellers.index.tolist() == list(range(len(processor.resellers)))
+    
+    reseller = processor.get_reseller('61.602.199/0024-09')
+    assert reseller is not None
+    assert reseller['CNPJ da Revenda'] == '61.602.199/0024-09'
+    assert reseller['Municipio'] == 'CAMPO GRANDE'
+    assert processor.get_reseller('61602199002409')['CNPJ da Revenda'] == '61.602.199/0024-09'
+    assert processor.get_reseller('00.000.000/0000-00') is None
+    
+    # Total de empresas conta CNPJs, não nomes de revenda
+    stats = processor.get_summary_stats()
+    last_week = processor.processed_df['Data da Coleta'].dt.to_period('W').dt.start_time
+    last_week_ids = processor.processed_df.loc[last_week == last_week.max(), 'reseller_id']
+    assert stats['kpis']['total_companies']['current'] == last_week_ids.nunique()
+
+
+def test_reseller_endpoint():
+    """GET /api/reseller/<cnpj> encontra a revenda com ou sem pontuação e responde 404 se não existe."""
+    client = _testing_client()
+    
+    for cnpj in ['61.602.199/0024-09', '61602199002409']:
+        response = client.get(f'/api/reseller/{cnpj}')
+        assert response.status_code == 200
+        payload = response.get_json()
+        assert payload['success'] is True
+        assert payload['data']['cnpj'] == '61.602.199/0024-09'
+        assert payload['data']['municipio'] == 'CAMPO GRANDE'
+    
+    response = client.get('/api/reseller/00.000.000/0000-00')
+    assert response.status_code == 404
+    assert response.get_json()['success'] is False
+
+
+def _json_search_columns(client, url):
+    """Colunas da resposta JSON da busca, com NaN normalizado para None."""
+    response = client.get(url)
+    assert response.status_code == 200
+    rows = response.get_json()['data']
+    assert rows
+    return {name: _normalize_nan([row[name] for row in rows]) for name in rows[0]}
+
+
+def _normalize_nan(values):
+    """Troca NaN por None para comparar colunas entre formatos."""
+    import math
+    return [None if isinstance(value, float) and math.isnan(value) else value for value in values]
+
+
+def test_match_cities():
+    """Acentos e erros de digitação resolvem para o município; prefixos trazem todos os que começam igual."""
+    processor = process_glp_data(SAMPLE_CSV_PATH, days_back=30)
+    
+    assert processor.match_cities('sao paolo') == ['SAO PAULO']
+    assert processor.match_cities('SÃO PAULO') == ['SAO PAULO']
+    assert processor.match_cities('belo horisonte') == ['BELO HORIZONTE']
+    assert processor.match_cities('xyzq') == []
+    
+    assert {'RIO BRANCO', 'RIO DE JANEIRO'} <= set(processor.match_cities('rio'))
+    assert {'SAO PAULO', 'SAO LUIS', 'SAO JOSE'} <= set(processor.match_cities('sao'))
+    assert {'CAMPO GRANDE', 'CAMPOS DOS GOYTACAZES'} <= set(processor.match_cities('campo'))
+    # O estado restringe os candidatos
+    assert processor.match_cities('rio', 'RJ') == ['RIO DE JANEIRO']
+
+
+def test_city_filters_and_suggest_endpoint():
+    """/api/stats usa todos os municípios do prefixo e /api/cities/suggest respeita o limite."""
+    client = _testing_client()
+    
+    kpis = client.get('/api/stats?city=rio').get_json()['data']
+    assert {'RIO BRANCO', 'RIO DE JANEIRO'} <= set(kpis['matched_cities'])
+    
+    response = client.get('/api/cities/suggest?q=sao paolo')
+    assert response.status_code == 200
+    suggestions = response.get_json()['data']
+    assert suggestions[0]['municipio'] == 'SAO PAULO'
+    
+    for limit, expected in [('-1', 1), ('0', 1), ('2', 2), ('500', 9)]:
+        response = client.get(f'/api/cities/suggest?q=sao&limit={limit}')
+        assert response.status_code == 200
+        assert len(response.get_json()['data']) == expected, limit
+    assert client.get('/api/cities/suggest?q=').get_json()['data'] == []
+
+
+def test_brand_comparison():
+    """O cubo de bandeiras reproduz as agregações feitas direto sobre as coletas."""
+    import pytest
+    processor = process_glp_data(SAMPLE_CSV_PATH, days_back=30)
+    assert processor.brand_cube['count'].sum() == (~processor.df['outlier']).sum()
+    
+    comparison = processor.get_brand_comparison(state='SP', brands=['ultragaz', 'SUPERGASBRAS'], weeks=52)
+    assert [brand['bandeira'] for brand in comparison['brands']] == ['SUPERGASBRAS ENERGIA', 'ULTRAGAZ']
+    
+    facts = processor.denormalize(processor.processed_df[~processor.processed_df['outlier']])
+    for brand in comparison['brands']:
+        rows = facts[(facts['Estado - Sigla'] == 'SP') & (facts['Bandeira'] == brand['bandeira'])]
+        assert brand['total_records'] == len(rows)
+        assert brand['avg_price'] == pytest.approx(rows['Valor de Venda'].mean())
+        assert brand['min_price'] == pytest.approx(rows['Valor de Venda'].min())
+        assert sum(week['count'] for week in brand['history']) == len(rows)
+    
+    assert len(processor.get_brand_comparison(weeks=2)['weeks']) == 2
+
+
+def test_brands_endpoint():
+    """GET /api/brands devolve semanas e bandeiras filtradas, da mais barata para a mais cara."""
+    client = _testing_client()
+    
+    response = client.get('/api/brands?state=SP&brands=ULTRAGAZ,SUPERGASBRAS')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['success'] is True
+    assert payload['filters_applied']['brands'] == ['ULTRAGAZ', 'SUPERGASBRAS']
+    
+    data = payload['data']
+    assert set(data) == {'weeks', 'brands'}
+    assert len(data['weeks']) == 4
+    assert {brand['bandeira'] for brand in data['brands']} == {'ULTRAGAZ', 'SUPERGASBRAS ENERGIA'}
+    for brand in data['brands']:
+        assert set(brand) == {'bandeira', 'total_records', 'avg_price', 'min_price', 'history'}
+        for week in brand['history']:
+            assert set(week) == {'week', 'count', 'avg_price', 'min_price'}
+            assert week['week'] in data['weeks']
+    prices = [brand['avg_price'] for brand in data['brands']]
+    assert prices == sorted(prices)
+    
+    data = client.get('/api/brands?weeks=2').get_json()['data']
+    assert len(data['weeks']) == 2
+    assert len(data['brands']) > 2
+
+
+def test_search_arrow_matches_json():
+    """A busca em Arrow IPC traz as mesmas colunas e valores do JSON."""
+    import pytest
+    pa = pytest.importorskip('pyarrow')
+    client = _testing_client()
+    expected = _json_search_columns(client, '/api/search?state=SP&limit=50')
+    
+    response = client.get('/api/search?state=SP&limit=50', headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    table = pa.ipc.open_stream(response.data).read_all()
+    columns = table.to_pydict()
+    columns['data_coleta'] = [value.strftime('%d/%m/%Y') for value in columns['data_coleta']]
+    
+    assert set(table.column_names) == set(expected)
+    for name, values in expected.items():
+        assert _normalize_nan(columns[name]) == values, name
+
+
+def test_search_msgpack_matches_json():
+    """A busca em MessagePack traz as mesmas colunas e valores do JSON."""
+    import pytest
+    msgpack = pytest.importorskip('msgpack')
+    client = _testing_client()
+    expected = _json_search_columns(client, '/api/search?state=SP&limit=50')
+    
+    response = client.get('/api/search?state=SP&limit=50&format=msgpack')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/msgpack'
+    payload = msgpack.unpackb(response.data)
+    assert payload['success'] is True
+    assert payload['total_results'] == len(expected['preco'])
+    
+    assert set(payload['columns']) == set(expected)
+    for name, values in expected.items():
+        assert _normalize_nan(payload['data'][name]) == values, name
+
+
+def test_search_unsupported_format():
+    """Formato desconhecido em ?format= responde 406 com os formatos disponíveis."""
+    client = _testing_client()
+    response = client.get('/api/search?format=xml')
+    assert response.status_code == 406
+    payload = response.get_json()
+    assert payload['success'] is False
+    assert 'application/json' in payload['error']
+
+
+def test_page_cache_builds_once_under_concurrency(monkeypatch):
+    """Requisições simultâneas à página principal sem cache montam o contexto uma única vez."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from src import app as app_module
+    
+    client = _testing_client()
+    app_module.PAGE_CACHE.clear()
+    
+    calls = []
+    real_get_summary_stats = app_module.DATA_PROCESSOR.get_summary_stats
+    
+    def slow_get_summary_stats(*args, **kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return real_get_summary_stats(*args, **kwargs)
+    
+    monkeypatch.setattr(app_module.DATA_PROCESSOR, 'get_summary_stats', slow_get_summary_stats)
+    
+    def fetch(_):
+        return client.application.test_client().get('/')
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(fetch, range(8)))
+    
+    assert len(calls) == 1
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.headers['ETag'] for response in responses}) == 1
+
+
+def _write_typo_csv(path):
+    """
+    CSV no formato da ANP com ~115 reais em SP e um erro de digitação (1150,00).
+    
+    Returns:
+        str: CNPJ da revenda com o preço digitado errado
+    """
+    header = ('Regiao - Sigla;Estado - Sigla;Municipio;Revenda;CNPJ da Revenda;Nome da Rua;Numero Rua;'
+              'Complemento;Bairro;Cep;Produto;Data da Coleta;Valor de Venda;Valor de Compra;'
+              'Unidade de Medida;Bandeira')
+    lines = [header]
+    for i in range(20):
+        price = f"{110 + i * 0.5:.2f}".replace('.', ',')
+        day = 10 + i % 10
+        lines.append(f"SE;SP;SAO PAULO;REVENDA {i:02d} LTDA; 10.000.000/00{i:02d}-00;RUA A;{i};;CENTRO;"
+                     f"01000-000;GLP;{day}/07/2025;{price};;R$ / 13 kg;ULTRAGAZ")
+    typo_cnpj = '99.999.999/0001-99'
+    lines.append(f"SE;SP;SAO PAULO;REVENDA DIGITADA LTDA; {typo_cnpj};RUA B;1;;CENTRO;"
+                 f"01000-000;GLP;15/07/2025;1150,00;;R$ / 13 kg;BRANCA")
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8-sig')
+    return typo_cnpj
+
+
+def test_price_outliers_flagged_and_trimmed(tmp_path, monkeypatch):
+    """Um preço 10x acima do estado é marcado e some das estatísticas com trimmed."""
+    from config import TestingConfig
+    
+    csv_path = tmp_path / 'glp-digitado.csv'
+    typo_cnpj = _write_typo_csv(csv_path)
+    
+    processor = process_glp_data(str(csv_path), days_back=30)
+    flagged = processor.df[processor.df['outlier']]
+    assert len(flagged) == 1
+    assert flagged['Valor de Venda'].iloc[0] == 1150.0
+    assert processor.resellers.loc[flagged['reseller_id'].iloc[0], 'CNPJ da Revenda'] == typo_cnpj
+    
+    trimmed = processor.subset(trimmed=True)
+    assert not trimmed.processed_df['outlier'].any()
+    assert trimmed.get_summary_stats()['max_price'] < 1150
+    assert processor.get_summary_stats()['max_price'] == 1150.0
+    
+    monkeypatch.setattr(TestingConfig, 'CSV_FILE_PATH', csv_path)
+    client = _testing_client()
+    
+    response = client.get('/api/stats?city=sao paulo&trimmed=1')
+    assert response.status_code == 200
+    kpis = response.get_json()['data']
+    assert kpis['trimmed'] is True
+    assert kpis['outlier_records'] == 0
+    assert kpis['max_price'] < 1150
+    
+    kpis = client.get('/api/stats?city=sao paulo').get_json()['data']
+    assert kpis['trimmed'] is False
+    assert kpis['outlier_records'] == 1
+    assert kpis['max_price'] == 1150.0
+
+
+def test_page_cache_encodings():
+    """Gzip e identidade têm ETags próprias, e gzip;q=0 recebe a página sem compressão."""
+    import gzip
+    client = _testing_client()
+    
+    plain = client.get('/about', headers={'Accept-Encoding': 'identity'})
+    compressed = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+    refused = client.get('/about', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    
+    assert plain.status_code == compressed.status_code == refused.status_code == 200
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in refused.headers
+    assert gzip.decompress(compressed.data) == plain.data == refused.data
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+    assert refused.headers['ETag'] == plain.headers['ETag']
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    
+    # A ETag de uma codificação não valida a outra
+    response = client.get('/about', headers={'Accept-Encoding': 'gzip', 'If-None-Match': plain.headers['ETag']})
+    assert response.status_code == 200
+    response = client.get('/about', headers={'Accept-Encoding': 'gzip',
+                                             'If-None-Match': compressed.headers['ETag']})
+    assert response.status_code == 304
+    response = client.get('/about', headers={'If-None-Match': compressed.headers['ETag']})
+    assert response.status_code == 200
+
+
+def test_api_rate_limit_per_client(monkeypatch):
+    """Com o limite ligado, a rota responde 429 com Retry-After por cliente do cabeçalho do proxy."""
+    from config import TestingConfig
+    
+    monkeypatch.setattr(TestingConfig, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'RATE_LIMIT_PER_SECOND', 0.5)
+    monkeypatch.setattr(TestingConfig, 'RATE_LIMIT_BURST', 3)
+    monkeypatch.setattr(TestingConfig, 'RATE_LIMIT_CLIENT_HEADER', 'X-Forwarded-For')
+    client = _testing_client()
+    first = {'X-Forwarded-For': '203.0.113.1'}
+    
+    for _ in range(3):
+        assert client.get('/api/states', headers=first).status_code == 200
+    response = client.get('/api/states', headers=first)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    assert response.get_json()['success'] is False
+    
+    # O endereço acrescentado pelo proxy (o último) identifica o cliente, não o enviado por ele
+    spoofed = {'X-Forwarded-For': '198.51.100.7, 203.0.113.1'}
+    assert client.get('/api/states', headers=spoofed).status_code == 429
+    assert client.get('/api/states', headers={'X-Forwarded-For': '203.0.113.2'}).status_code == 200
+    # Rotas fora de /api/ não são limitadas
+    assert client.get('/healthz', headers=first).status_code == 200
+
+
+def _count_concurrent_calls(monkeypatch, method_name, url, requests=8):
+    """Dispara requisições idênticas simultâneas e conta as chamadas ao método do processador."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from src import app as app_module
+    
+    client = _testing_client()
+    calls = []
+    real_method = getattr(app_module.DATA_PROCESSOR, method_name)
+    
+    def slow_method(*args, **kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return real_method(*args, **kwargs)
+    
+    monkeypatch.setattr(app_module.DATA_PROCESSOR, method_name, slow_method)
+    with ThreadPoolExecutor(max_workers=requests) as pool:
+        responses = list(pool.map(lambda _: client.application.test_client().get(url), range(requests)))
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.data for response in responses}) == 1
+    return len(calls)
+
+
+def test_concurrent_identical_search_computed_once(monkeypatch):
+    """Buscas idênticas simultâneas compartilham uma única consulta ao pandas."""
+    assert _count_concurrent_calls(monkeypatch, 'search_prices', '/api/search?state=SP&limit=20') == 1
+
+
+def test_concurrent_identical_stats_computed_once(monkeypatch):
+    """Estatísticas idênticas simultâneas compartilham um único cálculo."""
+    assert _count_concurrent_calls(monkeypatch, 'subset', '/api/stats?state=SP&trimmed=1') == 1
+
+
+def test_default_config_is_not_debug(monkeypatch):
+    """Sem FLASK_CONFIG a aplicação usa a configuração de produção, sem debug."""
+    from config import ProductionConfig
+    from src.app import create_app
+    
+    monkeypatch.delenv('FLASK_CONFIG', raising=False)
+    monkeypatch.setattr(ProductionConfig, 'DATA_LOAD_IN_BACKGROUND', False)
+    app = create_app()
+    assert app.debug is False
+    assert app.testing is False
+
+
+def test_background_load_readiness(monkeypatch):
+    """Rotas de dados respondem 503 enquanto o CSV carrega em segundo plano."""
+    import threading
+    from config import TestingConfig
+    from src import app as app_module
+    
+    release = threading.Event()
+    real_process_glp_data = app_module.process_glp_data
+    
+    def delayed_process_glp_data(*args, **kwargs):
+        release.wait(10)
+        return real_process_glp_data(*args, **kwargs)
+    
+    monkeypatch.setattr(TestingConfig, 'DATA_LOAD_IN_BACKGROUND', True)
+    monkeypatch.setattr(app_module, 'process_glp_data', delayed_process_glp_data)
+    client = app_module.create_app('testing').test_client()
+    
+    # Enquanto carrega: liveness ok, readiness e rotas de dados 503 com Retry-After
+    assert client.get('/healthz').status_code == 200
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'loading'
+    assert response.get_json()['ready'] is False
+    for url in ['/', '/api/stats', '/api/search?limit=5', '/api/cities']:
+        response = client.get(url)
+        assert response.status_code == 503, url
+        assert response.headers['Retry-After'] == '5'
+    assert client.get('/api/stats').get_json()['success'] is False
+    
+    # Depois da carga: tudo 200 e /readyz com versão, linhas e duração
+    release.set()
+    assert app_module.DATA_READY.wait(10)
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['status'] == 'ready'
+    assert payload['rows'] > 0
+    assert payload['version']
+    assert payload['load_duration_ms'] is not None
+    assert client.get('/api/stats').status_code == 200
+
+
+def test_background_load_failure(monkeypatch):
+    """Falha na carga em segundo plano: /readyz e rotas de dados respondem 503 com o erro."""
+    import time
+    from config import TestingConfig
+    from src import app as app_module
+    
+    def failing_process_glp_data(*args, **kwargs):
+        raise RuntimeError('CSV corrompido')
+    
+    monkeypatch.setattr(TestingConfig, 'DATA_LOAD_IN_BACKGROUND', True)
+    monkeypatch.setattr(app_module, 'process_glp_data', failing_process_glp_data)
+    client = app_module.create_app('testing').test_client()
+    
+    deadline = time.monotonic() + 10
+    while app_module.DATA_STATUS['status'] != 'error' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'error'
+    assert 'CSV corrompido' in response.get_json()['error']
+    
+    response = client.get('/api/stats')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert 'CSV corrompido' in response.get_json()['error']
+
+
 def test_template_files():
     """Testa se os arquivos de template existem."""
     print("\n📄 Testando arquivos de template...")
@@ -184,6 +731,9 @@ def main():
     # Testar API
     api_test_passed = test_api_endpoints()
     
+    # Testar controle de carga
+    test_throttling()
+    
     # Resultado final
     print("\n" + "=" * 60)
     if all([template_test_passed, static_test_passed, data_test_passed, api_test_passed]):
@@ -0,0 +1,205 @@
+"""
+Testes de desempenho: orçamentos de latência e memória sobre um dataset ANP sintético.
+
+O dataset é determinístico (semente fixa) e, por padrão, tem 500 mil coletas
+espalhadas por todos os estados. Tamanho e orçamentos são configuráveis por
+variáveis de ambiente:
+
+    PERF_ROWS=500000          número de coletas geradas
+    PERF_BUDGET_SCALE=1.0     multiplicador de todos os orçamentos (máquinas lentas/CI)
+
+Por padrão ficam de fora (addopts no pyproject.toml); para rodá-los: python -m pytest -m performance
+"""
+
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import TestingConfig
+from src.data_processor import process_glp_data
+
+pytestmark = pytest.mark.performance
+
+PERF_ROWS = int(os.environ.get('PERF_ROWS', 500_000))
+BUDGET_SCALE = float(os.environ.get('PERF_BUDGET_SCALE', 1.0))
+
+# Orçamentos para PERF_ROWS=500000 (escalados linearmente para outros tamanhos)
+LOAD_SECONDS_BUDGET = 10.0
+LOAD_PEAK_MB_BUDGET = 400.0
+SUMMARY_SECONDS_BUDGET = 1.5
+# Latência da primeira chamada de cada rota (sem cache de página/consulta)
+ROUTE_SECONDS_BUDGET = {
+    '/': 2.0,
+    '/about': 0.2,
+    '/api/search?limit=1000': 1.0,
+    '/api/search?city=sao paolo&limit=1000': 1.0,
+    '/api/search?state=SP&limit=1000&format=msgpack': 1.0,
+    '/api/cities': 0.5,
+    '/api/cities/suggest?q=rio de janiero': 0.2,
+    '/api/states': 0.5,
+    '/api/stats': 1.5,
+    '/api/stats?state=MG&trimmed=1': 1.0,
+    '/api/stats?city=campo grande': 1.0,
+    '/api/brands': 0.5,
+    '/api/brands?state=SP&brands=ULTRAGAZ,SUPERGASBRAS': 0.5,
+    '/api/reseller/00.000.000/0001-91': 0.1,
+    '/healthz': 0.1,
+    '/readyz': 0.1,
+}
+
+STATES = {
+    'N': ['AC', 'AM', 'AP', 'PA', 'RO', 'RR', 'TO'],
+    'NE': ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
+    'CO': ['DF', 'GO', 'MS', 'MT'],
+    'SE': ['ES', 'MG', 'RJ', 'SP'],
+    'S': ['PR', 'RS', 'SC'],
+}
+CITIES = ['SAO PAULO', 'RIO DE JANEIRO', 'CAMPO GRANDE', 'SÃO JOSÉ', 'BELO HORIZONTE', 'GOIÂNIA']
+BRANDS = ['BRANCA', 'ULTRAGAZ', 'SUPERGASBRAS ENERGIA', 'NACIONAL GÁS BUTANO', 'LIQUIGÁS',
+          'FOGAS', 'COPA ENERGIA', 'CONSIGAZ']
+HEADER = ['Regiao - Sigla', 'Estado - Sigla', 'Municipio', 'Revenda', 'CNPJ da Revenda', 'Nome da Rua',
+          'Numero Rua', 'Complemento', 'Bairro', 'Cep', 'Produto', 'Data da Coleta', 'Valor de Venda',
+          'Valor de Compra', 'Unidade de Medida', 'Bandeira']
+
+
+def budget(seconds_or_mb: float) -> float:
+    """Escala o orçamento pelo número de linhas (base 500 mil) e por PERF_BUDGET_SCALE."""
+    rows_factor = max(PERF_ROWS / 500_000, 0.1)
+    return seconds_or_mb * rows_factor * BUDGET_SCALE
+
+
+def build_synthetic_csv(path: Path, rows: int, seed: int = 42) -> None:
+    """
+    Gera um CSV no formato da ANP (BOM, ';', vírgula decimal, CNPJ com espaço inicial).
+
+    Cada revenda tem cerca de 20 coletas nas últimas 4 semanas; cada estado
+    tem 40 municípios (os primeiros com nomes reais, com acentos) e ~0,1% dos
+    preços são erros de digitação (10x o valor).
+    """
+    rng = np.random.default_rng(seed)
+    regions = [(region, state) for region, states in STATES.items() for state in states]
+
+    n_resellers = max(rows // 20, len(regions))
+    reseller_state = np.arange(n_resellers) % len(regions)
+    city_index = rng.integers(0, 40, n_resellers)
+    city_names = np.array(CITIES + [f'MUNICIPIO {i:02d}' for i in range(len(CITIES), 40)], dtype=object)
+    reseller_city = city_names[city_index]
+    reseller_brand = np.array(BRANDS, dtype=object)[rng.integers(0, len(BRANDS), n_resellers)]
+    reseller_cnpj = np.array(
+        [f' {i // 10000:02d}.{i % 10000 // 10:03d}.{i % 10:03d}/0001-91' for i in range(n_resellers)],
+        dtype=object
+    )
+    base_price = rng.normal(110, 8, n_resellers).round(2)
+
+    reseller = rng.integers(0, n_resellers, rows)
+    state = reseller_state[reseller]
+    prices = (base_price[reseller] + rng.normal(0, 2, rows)).round(2)
+    typos = rng.random(rows) < 0.001
+    prices[typos] = prices[typos] * 10
+    dates = pd.Timestamp('2025-08-15') - pd.to_timedelta(rng.integers(0, 28, rows), unit='D')
+
+    df = pd.DataFrame({
+        'Regiao - Sigla': np.array([region for region, _ in regions], dtype=object)[state],
+        'Estado - Sigla': np.array([uf for _, uf in regions], dtype=object)[state],
+        'Municipio': reseller_city[reseller],
+        'Revenda': pd.Series(reseller).map('REVENDA {:06d} LTDA'.format).to_numpy(),
+        'CNPJ da Revenda': reseller_cnpj[reseller],
+        'Nome da Rua': 'RUA PRINCIPAL',
+        'Numero Rua': (reseller % 2000).astype(str),
+        'Complemento': '',
+        'Bairro': 'CENTRO',
+        'Cep': '01000-000',
+        'Produto': 'GLP',
+        'Data da Coleta': dates.strftime('%d/%m/%Y'),
+        'Valor de Venda': pd.Series(prices).map('{:.2f}'.format).str.replace('.', ',', regex=False).to_numpy(),
+        'Valor de Compra': '',
+        'Unidade de Medida': 'R$ / 13 kg',
+        'Bandeira': reseller_brand[reseller],
+    }, columns=HEADER)
+    df.to_csv(path, sep=';', index=False, encoding='utf-8-sig')
+
+
+@pytest.fixture(scope='session')
+def synthetic_csv(tmp_path_factory):
+    """Caminho do CSV sintético, gerado uma vez por sessão."""
+    path = tmp_path_factory.mktemp('anp') / 'glp-sintetico.csv'
+    build_synthetic_csv(path, PERF_ROWS)
+    return path
+
+
+@pytest.fixture(scope='session')
+def processor(synthetic_csv):
+    """Processador carregado a partir do CSV sintético."""
+    logging.disable(logging.INFO)
+    try:
+        return process_glp_data(str(synthetic_csv), days_back=30)
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(scope='session')
+def client(synthetic_csv):
+    """Cliente de teste do Flask com a aplicação apontando para o CSV sintético."""
+    from src.app import create_app
+
+    logging.disable(logging.INFO)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(TestingConfig, 'CSV_FILE_PATH', synthetic_csv)
+        app = create_app('testing')
+    logging.disable(logging.NOTSET)
+    return app.test_client()
+
+
+def test_process_glp_data_latency_and_memory(synthetic_csv):
+    """Carga + limpeza + normalização + cubos dentro dos orçamentos de tempo e memória."""
+    logging.disable(logging.INFO)
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        loaded = process_glp_data(str(synthetic_csv), days_back=30)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        logging.disable(logging.NOTSET)
+
+    peak_mb = peak / 1024 / 1024
+    print(f"\n   process_glp_data: {elapsed:.2f} s, pico {peak_mb:.0f} MB ({len(loaded.processed_df)} linhas)")
+    assert len(loaded.processed_df) > 0.9 * PERF_ROWS
+    assert elapsed <= budget(LOAD_SECONDS_BUDGET), f"Carga levou {elapsed:.2f} s"
+    assert peak_mb <= budget(LOAD_PEAK_MB_BUDGET), f"Pico de memória de {peak_mb:.0f} MB"
+
+
+def test_get_summary_stats_latency(processor):
+    """Estatísticas resumidas (KPIs + histórico semanal) dentro do orçamento."""
+    start = time.perf_counter()
+    stats = processor.get_summary_stats()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n   get_summary_stats: {elapsed * 1000:.0f} ms")
+    assert stats['total_records'] == len(processor.processed_df)
+    assert stats['kpis']['total_states']['current'] == sum(len(states) for states in STATES.values())
+    assert stats['outlier_records'] > 0
+    assert elapsed <= budget(SUMMARY_SECONDS_BUDGET)
+
+
+@pytest.mark.parametrize('url', list(ROUTE_SECONDS_BUDGET))
+def test_route_latency(client, url):
+    """Primeira chamada de cada rota responde com sucesso dentro do orçamento."""
+    start = time.perf_counter()
+    response = client.get(url)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n   GET {url}: {response.status_code} em {elapsed * 1000:.0f} ms")
+    assert response.status_code == 200
+    assert elapsed <= budget(ROUTE_SECONDS_BUDGET[url]), f"GET {url} levou {elapsed:.2f} s"